@@ -1,6 +1,13 @@
 import sys
 import os
-from datetime import datetime
+import time
+import heapq
+import math
+import random
+import threading
+from datetime import datetime, timezone, timedelta
+from operator import itemgetter
+from types import MappingProxyType
 from typing import List, Dict, Any, Optional
 import telebot  # type: ignore
 from loguru import logger  # type: ignore
@@ -15,25 +22,38 @@ from src.data_collection.weather_sources import WeatherDataCollector  # type: ig
 from src.data_collection.city_risk_profiles import get_city_risk_profile, format_risk_warning  # type: ignore
 from src.analysis.deb_algorithm import calculate_dynamic_weights, update_daily_record
 
-def analyze_weather_trend(weather_data, temp_symbol, city_name=None):
-    '''根据实测与预测分析气温态势，增加峰值时刻预测'''
+_SQRT2 = math.sqrt(2)
+
+# 链式 .get(key, _EMPTY) 的共享默认值：只读视图，避免每次调用新建空 dict，也防止被误改
+_EMPTY = MappingProxyType({})
+
+
+def _norm_cdf(x, m, s):
+    """简化的正态 CDF (不依赖 scipy)"""
+    return 0.5 * (1 + math.erf((x - m) / (s * _SQRT2)))
+
+
+def analyze_weather_trend(weather_data, temp_symbol, city_name=None, risk_profile=None):
+    '''根据实测与预测分析气温态势，增加峰值时刻预测
+    risk_profile: 调用方已查到的城市风险档案，传入可免去重复查询'''
     insights: List[str] = []
     ai_features: List[str] = []
     
-    metar = weather_data.get("metar", {})
-    open_meteo = weather_data.get("open-meteo", {})
-    mb = weather_data.get("meteoblue", {})
-    nws = weather_data.get("nws", {})
-    mgm = weather_data.get("mgm", {})
+    metar = weather_data.get("metar", _EMPTY)
+    open_meteo = weather_data.get("open-meteo", _EMPTY)
+    mb = weather_data.get("meteoblue", _EMPTY)
+    nws = weather_data.get("nws", _EMPTY)
+    mgm = weather_data.get("mgm", _EMPTY)
     
     if not metar or not open_meteo:
         return "", ""
 
         
-    curr_temp = metar.get("current", {}).get("temp")
-    max_so_far = metar.get("current", {}).get("max_temp_so_far")  # 今日实测最高
-    daily = open_meteo.get("daily", {})
-    hourly = open_meteo.get("hourly", {})
+    metar_cur = metar.get("current", _EMPTY)
+    curr_temp = metar_cur.get("temp")
+    max_so_far = metar_cur.get("max_temp_so_far")  # 今日实测最高
+    daily = open_meteo.get("daily", _EMPTY)
+    hourly = open_meteo.get("hourly", _EMPTY)
     times = hourly.get("time", [])
     temps = hourly.get("temperature_2m", [])
     
@@ -47,31 +67,35 @@ def analyze_weather_trend(weather_data, temp_symbol, city_name=None):
     if nws.get("today_high") is not None:
         current_forecasts["NWS"] = nws.get("today_high")
         
-    mm_forecasts = weather_data.get("multi_model", {}).get("forecasts", {})
+    mm_forecasts = weather_data.get("multi_model", _EMPTY).get("forecasts", _EMPTY)
     for m_name, m_val in mm_forecasts.items():
         if m_val is not None:
             current_forecasts[m_name] = m_val
             
     # 从 URL/入参里我们暂时拿不到城名，为了 DEB 追溯我们在后方的总控那里提取。这里的 analyze_weather_trend 主要计算最高预留。
-    forecast_highs = [h for h in current_forecasts.values() if h is not None]
-    forecast_high = max(forecast_highs) if forecast_highs else None
-    min_forecast_high = min(forecast_highs) if forecast_highs else forecast_high
-    forecast_median = sorted(forecast_highs)[len(forecast_highs) // 2] if forecast_highs else None
+    # 一次降序排序同时得到最高值和中位数（稳定排序，[0] 与 max() 取到的是同一个值）
+    forecast_highs = sorted((h for h in current_forecasts.values() if h is not None), reverse=True)
+    if forecast_highs:
+        forecast_high = forecast_highs[0]
+        forecast_median = forecast_highs[len(forecast_highs) - 1 - len(forecast_highs) // 2]
+    else:
+        forecast_high = forecast_median = None
     
-    wind_speed = metar.get("current", {}).get("wind_speed_kt", 0)
+    wind_speed = metar_cur.get("wind_speed_kt", 0)
     
     # 获取当地时间小时和分钟
-    local_time_full = open_meteo.get("current", {}).get("local_time", "")
+    om_current = open_meteo.get("current", _EMPTY)
     try:
-        local_date_str = local_time_full.split(" ")[0]
-        time_parts = local_time_full.split(" ")[1].split(":")
-        local_hour = int(time_parts[0])
-        local_minute = int(time_parts[1]) if len(time_parts) > 1 else 0
-    except:
-        from datetime import datetime
-        local_date_str = datetime.now().strftime("%Y-%m-%d")
-        local_hour = datetime.now().hour
-        local_minute = datetime.now().minute
+        local_date_str = om_current["local_date"]
+        hour_part, _, minute_part = om_current["local_hm"].partition(":")
+        local_hour = int(hour_part)
+        local_minute = int(minute_part) if minute_part else 0
+    except (KeyError, AttributeError, TypeError, ValueError):
+        # 只取一次当前时间，避免三次调用恰好跨过整点/午夜时日期和时分互相矛盾
+        now_local = datetime.now()
+        local_date_str = now_local.strftime("%Y-%m-%d")
+        local_hour = now_local.hour
+        local_minute = now_local.minute
     local_hour_frac = local_hour + local_minute / 60  # 含分钟的精确小时
 
     # === DEB 融合渲染 ===
@@ -84,12 +108,13 @@ def analyze_weather_trend(weather_data, temp_symbol, city_name=None):
         # 顺便把今天的预测记录下来供之后回测用
         try:
             update_daily_record(city_name, local_date_str, current_forecasts, max_so_far)
-        except:
-            pass
+        except Exception as e:
+            logger.warning(f"DEB 记录保存失败: {e}")
 
     # === METAR 趋势分析 (移到前部判断降温) ===
     recent_temps = metar.get("recent_temps", [])
     trend_desc = ""
+    is_cooling = False  # 在判定分支里直接置位，不再事后对描述文本做子串匹配
     if len(recent_temps) >= 2:
         temps_only = [t for _, t in recent_temps]
         latest_val = temps_only[0]
@@ -102,13 +127,15 @@ def analyze_weather_trend(weather_data, temp_symbol, city_name=None):
             trend_display = " → ".join([f"{t}{temp_symbol}@{tm}" for tm, t in recent_temps[:3]])
             if all_same: trend_desc = f"📉 温度已停滞（{trend_display}），大概率到顶。"
             elif all_rising and diff > 0: trend_desc = f"📈 仍在升温（{trend_display}）。"
-            elif all_falling and diff < 0: trend_desc = f"📉 已开始降温（{trend_display}）。"
+            elif all_falling and diff < 0:
+                trend_desc = f"📉 已开始降温（{trend_display}）。"
+                is_cooling = True
             else: trend_desc = f"📊 温度波动中（{trend_display}）。"
         elif diff == 0: trend_desc = f"📉 温度持平（最近两条都是 {latest_val}{temp_symbol}）。"
         elif diff > 0: trend_desc = f"📈 仍在升温（{prev_val} → {latest_val}{temp_symbol}）。"
-        else: trend_desc = f"📉 已开始降温（{prev_val} → {latest_val}{temp_symbol}）。"
-
-    is_cooling = "降温" in trend_desc
+        else:
+            trend_desc = f"📉 已开始降温（{prev_val} → {latest_val}{temp_symbol}）。"
+            is_cooling = True
 
     om_today = daily.get("temperature_2m_max", [None])[0]
 
@@ -116,11 +143,14 @@ def analyze_weather_trend(weather_data, temp_symbol, city_name=None):
     # 只在白天时段 (8:00-19:00) 内搜索，避免夜间温差小时把凌晨误判为峰值
     peak_hours = []
     if times and temps and om_today is not None:
+        # 时间戳格式 "YYYY-MM-DDTHH:MM"：日期前缀固定长度，直接切片取时分，不必每条 split
+        day_prefix = f"{local_date_str}T"
+        hm_start = len(day_prefix)
         for t_str, temp in zip(times, temps):
-            if t_str.startswith(local_date_str) and abs(temp - om_today) <= 0.2:
-                hour = int(t_str.split("T")[1][:2])
-                if 8 <= hour <= 19:  # 只考虑白天
-                    peak_hours.append(t_str.split("T")[1][:5])
+            if t_str.startswith(day_prefix) and abs(temp - om_today) <= 0.2:
+                hm = t_str[hm_start:hm_start + 5]
+                if 8 <= int(hm[:2]) <= 19:  # 只考虑白天
+                    peak_hours.append(hm)
     if peak_hours:
         first_peak_h = int(peak_hours[0].split(":")[0])
         last_peak_h = int(peak_hours[-1].split(":")[0])
@@ -128,7 +158,7 @@ def analyze_weather_trend(weather_data, temp_symbol, city_name=None):
         first_peak_h, last_peak_h = 13, 15
 
     # === 集合预报区间 ===
-    ensemble = weather_data.get("ensemble", {})
+    ensemble = weather_data.get("ensemble", _EMPTY)
     ens_p10 = ensemble.get("p10")
     ens_p90 = ensemble.get("p90")
     ens_median = ensemble.get("median")
@@ -146,7 +176,6 @@ def analyze_weather_trend(weather_data, temp_symbol, city_name=None):
                 ai_features.append(msg2)
 
         # === 数学概率计算（基于集合预报正态分布拟合）===
-        import math as _math
         # 用 P10/P90 反推标准差: P10 = median - 1.28*sigma, P90 = median + 1.28*sigma
         sigma = (ens_p90 - ens_p10) / 2.56
         if sigma < 0.1: sigma = 0.1  # 防止除以零
@@ -176,21 +205,20 @@ def analyze_weather_trend(weather_data, temp_symbol, city_name=None):
                 # 已降温，以实测峰值为锚
                 mu = max_so_far
         
-        # 简化的正态 CDF (不依赖 scipy)
-        def _norm_cdf(x, m, s):
-            return 0.5 * (1 + _math.erf((x - m) / (s * _math.sqrt(2))))
-        
         # 计算每个 WU 整数区间 [N-0.5, N+0.5) 的概率
         center = round(mu)
         candidates = range(center - 2, center + 3)  # 5 个候选整数
         # 如果已有实测最高温，低于该值的 WU 结算整数不可能出现
         min_possible_wu = round(max_so_far) if max_so_far is not None else -999
         
+        # 相邻区间共用边界：6 个边界点的 CDF 只算一次
+        edge_cdf = {n: _norm_cdf(n - 0.5, mu, sigma) for n in range(center - 2, center + 4)}
+        
         probs = {}
         for n in candidates:
             if n < min_possible_wu:
                 continue  # 已实测超过此温度，不可能结算在这里
-            p = _norm_cdf(n + 0.5, mu, sigma) - _norm_cdf(n - 0.5, mu, sigma)
+            p = edge_cdf[n + 1] - edge_cdf[n]
             if p > 0.01:
                 probs[n] = p
         
@@ -199,9 +227,9 @@ def analyze_weather_trend(weather_data, temp_symbol, city_name=None):
         if total_p > 0:
             probs = {k: v / total_p for k, v in probs.items()}
         
-        # 格式化输出（按概率从高到低排列，显示区间）
-        sorted_probs = sorted(probs.items(), key=lambda x: x[1], reverse=True)
-        prob_parts = [f"{int(t)}{temp_symbol} [{t-0.5}~{t+0.5}) {p*100:.0f}%" for t, p in sorted_probs[:4]]
+        # 格式化输出（按概率从高到低取前 4 个，显示区间）
+        top_probs = heapq.nlargest(4, probs.items(), key=itemgetter(1))
+        prob_parts = [f"{int(t)}{temp_symbol} [{t-0.5}~{t+0.5}) {p*100:.0f}%" for t, p in top_probs]
         if prob_parts:
             prob_str = " | ".join(prob_parts)
             insights.append(f"🎲 <b>结算概率</b> (μ={mu:.1f})：{prob_str}")
@@ -254,50 +282,119 @@ def analyze_weather_trend(weather_data, temp_symbol, city_name=None):
 
     # === 其他 AI 专供的事实特征 ===
     # 明确告知 AI 当前实测温度和今日最高温，避免 AI 从趋势数据中误读
-    current_temp = metar.get("current", {}).get("temp")
-    if current_temp is not None:
-        ai_features.append(f"🌡️ 当前实测温度: {current_temp}{temp_symbol}。")
+    if curr_temp is not None:
+        ai_features.append(f"🌡️ 当前实测温度: {curr_temp}{temp_symbol}。")
     if max_so_far is not None:
         ai_features.append(f"🏔️ 今日实测最高温: {max_so_far}{temp_symbol} (WU结算={round(max_so_far)}{temp_symbol})。")
     
     # 传递城市的 METAR 取整特性给 AI
-    from src.data_collection.city_risk_profiles import get_city_risk_profile
     if city_name:
-        _profile = get_city_risk_profile(city_name)
+        _profile = risk_profile if risk_profile is not None else get_city_risk_profile(city_name)
         if _profile and _profile.get("metar_rounding"):
             ai_features.append(f"⚠️ METAR特性: {_profile['metar_rounding']}")
     if wind_speed:
-        wind_dir = metar.get("current", {}).get("wind_dir", "未知")
+        wind_dir = metar_cur.get("wind_dir", "未知")
         ai_features.append(f"🌬️ 当下风况: 约 {wind_speed}kt (方向 {wind_dir}°)。")
-    humidity = metar.get("current", {}).get("humidity")
+    humidity = metar_cur.get("humidity")
     if humidity and humidity > 80: ai_features.append(f"💦 湿度极高 ({humidity}%)。")
     
-    clouds = metar.get("current", {}).get("clouds", [])
+    clouds = metar_cur.get("clouds", [])
     if clouds:
         cover = clouds[-1].get("cover", "")
         c_desc = {"OVC": "全阴", "BKN": "多云", "SCT": "散云", "FEW": "少云"}.get(cover, cover)
         ai_features.append(f"☁️ 天空状况: {c_desc}。")
 
-    wx_desc = metar.get("current", {}).get("wx_desc")
+    wx_desc = metar_cur.get("wx_desc")
     if wx_desc: ai_features.append(f"🌧️ 天气现象: {wx_desc}。")
 
-    max_temp_time_str = metar.get("current", {}).get("max_temp_time", "")
+    max_temp_time_str = metar_cur.get("max_temp_time", "")
     if max_so_far is not None and max_temp_time_str:
         try:
             max_h = int(max_temp_time_str.split(":")[0])
             max_temp_rad = 0.0
             hourly_rad = hourly.get("shortwave_radiation", [])
-            for t_str, rad in zip(times, hourly_rad):
-                if t_str.startswith(local_date_str) and int(t_str.split("T")[1][:2]) == max_h:
-                    max_temp_rad = rad if rad is not None else 0.0
-                    break
+            # 逐小时时间戳格式固定为 "YYYY-MM-DDTHH:00"，直接按键定位，无需逐条解析比较
+            try:
+                rad_idx = times.index(f"{local_date_str}T{max_h:02d}:00")
+            except ValueError:
+                rad_idx = -1
+            if 0 <= rad_idx < len(hourly_rad) and hourly_rad[rad_idx] is not None:
+                max_temp_rad = hourly_rad[rad_idx]
             if max_temp_rad < 50:
                 ai_features.append(f"🌙 动力事实: 最高温出现在低辐射时段 ({max_temp_time_str}, 辐射{max_temp_rad:.0f}W/m²)。")
-        except: pass
+        except (AttributeError, TypeError, ValueError):
+            pass
 
     display_str = "\n".join(insights) if insights else ""
     return display_str, "\n".join(ai_features)
 
+# --- 核心标准名称映射表 ---
+# 这里的 Key 是缩写或别名，Value 是 Open-Meteo 识别的标准全称
+STANDARD_MAPPING = {
+    "sel": "seoul", "seo": "seoul", "首尔": "seoul",
+    "lon": "london", "伦敦": "london",
+    "tor": "toronto", "多伦多": "toronto",
+    "ank": "ankara", "安卡拉": "ankara",
+    "wel": "wellington", "惠灵顿": "wellington",
+    "ba": "buenos aires", "布宜诺斯艾利斯": "buenos aires",
+    "nyc": "new york", "ny": "new york", "纽约": "new york",
+    "chi": "chicago", "芝加哥": "chicago",
+    "sea": "seattle", "西雅图": "seattle",
+    "mia": "miami", "迈阿密": "miami",
+    "atl": "atlanta", "亚特兰大": "atlanta",
+    "dal": "dallas", "达拉斯": "dallas",
+    "la": "los angeles", "洛杉矶": "los angeles",
+    "par": "paris", "巴黎": "paris",
+}
+
+# 支持的城市全名列表（用于模糊匹配和报错提示）
+SUPPORTED_CITIES = sorted(set(STANDARD_MAPPING.values()))
+SUPPORTED_CITY_SET = frozenset(SUPPORTED_CITIES)  # 成员判断用，避免线性扫描列表
+
+
+def _build_city_prefix_index():
+    """预建 前缀(≥2字符) → 城市全名 索引，先登记别名再登记全名，保持原有匹配优先级"""
+    index = {}
+    for alias, full_name in STANDARD_MAPPING.items():
+        for i in range(2, len(alias) + 1):
+            index.setdefault(alias[:i], full_name)
+    for full_name in SUPPORTED_CITIES:
+        for i in range(2, len(full_name) + 1):
+            index.setdefault(full_name[:i], full_name)
+    return index
+
+
+CITY_PREFIX_INDEX = _build_city_prefix_index()
+
+# /city 每个聊天的令牌桶限流：平均 2 秒 1 次，允许连发 3 次
+_RATE_BURST = 3.0
+_RATE_PER_SEC = 0.5
+_rate_buckets = {}  # chat_id -> (上次时间, 剩余令牌)
+_rate_lock = threading.Lock()
+# 闲置超过该时长的桶令牌已回满，与不存在等价，可定期清掉，避免字典随聊天数无限增长
+_RATE_IDLE_SEC = _RATE_BURST / _RATE_PER_SEC
+_RATE_PRUNE_INTERVAL = 300.0
+_last_rate_prune = 0.0
+
+
+def _allow_query(chat_id):
+    """令牌桶判断该聊天能否发起一次查询（handler 在线程池中执行，需加锁）"""
+    global _last_rate_prune
+    now = time.monotonic()
+    with _rate_lock:
+        if now - _last_rate_prune > _RATE_PRUNE_INTERVAL:
+            for cid in [c for c, (ts, _) in _rate_buckets.items() if now - ts >= _RATE_IDLE_SEC]:
+                del _rate_buckets[cid]
+            _last_rate_prune = now
+        last, tokens = _rate_buckets.get(chat_id, (now, _RATE_BURST))
+        tokens = min(_RATE_BURST, tokens + (now - last) * _RATE_PER_SEC)
+        if tokens < 1:
+            _rate_buckets[chat_id] = (now, tokens)
+            return False
+        _rate_buckets[chat_id] = (now, tokens - 1)
+        return True
+
+
 def start_bot():
     config = load_config()
     token = os.getenv("TELEGRAM_BOT_TOKEN")
@@ -305,7 +402,9 @@ def start_bot():
         logger.error("未找到 TELEGRAM_BOT_TOKEN 环境变量")
         return
 
-    bot = telebot.TeleBot(token)
+    # 处理器在工作线程中执行：一次 /city 要等各数据源返回，
+    # 默认 2 个线程时其它用户的指令会排队，放宽到 8 个
+    bot = telebot.TeleBot(token, threaded=True, num_threads=8)
     weather = WeatherDataCollector(config)
 
     @bot.message_handler(commands=["start", "help"])
@@ -325,6 +424,7 @@ def start_bot():
             message,
             f"🎯 当前聊天的 Chat ID 是: <code>{message.chat.id}</code>",
             parse_mode="HTML",
+            disable_notification=True,
         )
 
     @bot.message_handler(commands=["city"])
@@ -342,52 +442,20 @@ def start_bot():
 
             city_input = parts[1].strip().lower()
             
-            # --- 核心标准名称映射表 ---
-            # 这里的 Key 是缩写或别名，Value 是 Open-Meteo 识别的标准全称
-            STANDARD_MAPPING = {
-                "sel": "seoul", "seo": "seoul", "首尔": "seoul",
-                "lon": "london", "伦敦": "london",
-                "tor": "toronto", "多伦多": "toronto",
-                "ank": "ankara", "安卡拉": "ankara",
-                "wel": "wellington", "惠灵顿": "wellington",
-                "ba": "buenos aires", "布宜诺斯艾利斯": "buenos aires",
-                "nyc": "new york", "ny": "new york", "纽约": "new york",
-                "chi": "chicago", "芝加哥": "chicago",
-                "sea": "seattle", "西雅图": "seattle",
-                "mia": "miami", "迈阿密": "miami",
-                "atl": "atlanta", "亚特兰大": "atlanta",
-                "dal": "dallas", "达拉斯": "dallas",
-                "la": "los angeles", "洛杉矶": "los angeles",
-                "par": "paris", "巴黎": "paris",
-            }
-            
-            # 支持的城市全名列表（用于模糊匹配）
-            SUPPORTED_CITIES = list(set(STANDARD_MAPPING.values()))
-            
             # 1. 第一优先级：严格全字匹配（别名/缩写）
             city_name = STANDARD_MAPPING.get(city_input)
             
             # 2. 第二优先级：输入本身就是城市全名
-            if not city_name and city_input in SUPPORTED_CITIES:
+            if not city_name and city_input in SUPPORTED_CITY_SET:
                 city_name = city_input
             
-            # 3. 第三优先级：前缀匹配（在别名和城市全名中搜索）
+            # 3. 第三优先级：前缀匹配（查预建的前缀索引，别名优先于城市全名）
             if not city_name and len(city_input) >= 2:
-                # 先搜别名
-                for k, v in STANDARD_MAPPING.items():
-                    if k.startswith(city_input):
-                        city_name = v
-                        break
-                # 再搜城市全名
-                if not city_name:
-                    for full_name in SUPPORTED_CITIES:
-                        if full_name.startswith(city_input):
-                            city_name = full_name
-                            break
+                city_name = CITY_PREFIX_INDEX.get(city_input)
             
             # 4. 未找到 → 报错，列出支持的城市
             if not city_name:
-                city_list = ", ".join(sorted(set(STANDARD_MAPPING.values())))
+                city_list = ", ".join(SUPPORTED_CITIES)
                 bot.reply_to(
                     message,
                     f"❌ 未找到城市: <b>{city_input}</b>\n\n"
@@ -397,7 +465,16 @@ def start_bot():
                 )
                 return
 
-            bot.send_message(message.chat.id, f"🔍 正在查询 {city_name.title()} 的天气数据...")
+            # 限流放在真正发起网络请求之前，用法提示/城市报错不受影响
+            if not _allow_query(message.chat.id):
+                logger.info(f"聊天 {message.chat.id} 查询过于频繁，已忽略: {city_name}")
+                return
+
+            bot.send_message(
+                message.chat.id,
+                f"🔍 正在查询 {city_name.title()} 的天气数据...",
+                disable_notification=True,
+            )
 
             coords = weather.get_coordinates(city_name)
             if not coords:
@@ -405,16 +482,15 @@ def start_bot():
                 return
 
             weather_data = weather.fetch_all_sources(city_name, lat=coords["lat"], lon=coords["lon"])
-            open_meteo = weather_data.get("open-meteo", {})
-            metar = weather_data.get("metar", {})
-            mgm = weather_data.get("mgm", {})
+            open_meteo = weather_data.get("open-meteo", _EMPTY)
+            metar = weather_data.get("metar", _EMPTY)
+            mgm = weather_data.get("mgm", _EMPTY)
             
             temp_unit = open_meteo.get("unit", "celsius")
             temp_symbol = "°F" if temp_unit == "fahrenheit" else "°C"
             
             # --- 1. 紧凑 Header (城市 + 时间 + 风险状态) ---
-            local_time = open_meteo.get("current", {}).get("local_time", "")
-            time_str = local_time.split(" ")[1][:5] if " " in local_time else "N/A"
+            time_str = open_meteo.get("current", _EMPTY).get("local_hm") or "N/A"
             
             risk_profile = get_city_risk_profile(city_name)
             risk_emoji = risk_profile.get("risk_level", "⚪") if risk_profile else "⚪"
@@ -428,13 +504,13 @@ def start_bot():
                 msg_lines.append(f"⚠️ {risk_profile.get('airport_name', '')}: {bias}{temp_symbol} | {risk_profile.get('warning', '')}")
 
             # --- 3. 紧凑 预测区 ---
-            daily = open_meteo.get("daily", {})
+            daily = open_meteo.get("daily", _EMPTY)
             dates = daily.get("time", [])[:3]
             max_temps = daily.get("temperature_2m_max", [])[:3]
             
-            nws_high = weather_data.get("nws", {}).get("today_high")
+            nws_high = weather_data.get("nws", _EMPTY).get("today_high")
             mgm_high = mgm.get("today_high")
-            mb_high = weather_data.get("meteoblue", {}).get("today_high")
+            mb_high = weather_data.get("meteoblue", _EMPTY).get("today_high")
             
             # 今天对比
             today_t = max_temps[0] if max_temps else "N/A"
@@ -462,7 +538,8 @@ def start_bot():
             comp_str = f" ({' | '.join(comp_parts)})" if comp_parts else ""
             sources_str = " | ".join(sources)
             
-            msg_lines.append(f"\n📊 <b>预报 ({sources_str})</b>")
+            msg_lines.append("")
+            msg_lines.append(f"📊 <b>预报 ({sources_str})</b>")
             msg_lines.append(f"👉 <b>今天: {today_t}{temp_symbol}{comp_str}</b>{divergence_warning}")
             
             # 明后天
@@ -487,9 +564,10 @@ def start_bot():
 
             # --- 4. 核心 实测区 (合并 METAR 和 MGM) ---
             # 基础数据优先用 METAR
-            cur_temp = metar.get("current", {}).get("temp") if metar else mgm.get("current", {}).get("temp")
-            max_p = metar.get("current", {}).get("max_temp_so_far") if metar else None
-            max_p_time = metar.get("current", {}).get("max_temp_time") if metar else None
+            metar_cur = metar.get("current", _EMPTY)
+            cur_temp = metar_cur.get("temp") if metar else mgm.get("current", _EMPTY).get("temp")
+            max_p = metar_cur.get("max_temp_so_far")
+            max_p_time = metar_cur.get("max_temp_time")
             obs_t_str = "N/A"
             metar_age_min = None  # METAR 数据年龄（分钟）
             main_source = "METAR" if metar else "MGM"
@@ -498,7 +576,6 @@ def start_bot():
                 obs_t = metar.get("observation_time", "")
                 try:
                     if "T" in obs_t:
-                        from datetime import datetime, timezone, timedelta
                         dt = datetime.fromisoformat(obs_t.replace("Z", "+00:00"))
                         utc_offset = open_meteo.get("utc_offset", 0)
                         local_dt = dt.astimezone(timezone(timedelta(seconds=utc_offset)))
@@ -510,12 +587,11 @@ def start_bot():
                         obs_t_str = obs_t.split(" ")[1][:5]
                     else:
                         obs_t_str = obs_t
-                except:
+                except (AttributeError, TypeError, ValueError):
                     obs_t_str = obs_t[:16]
             elif mgm:
-                m_time = mgm.get("current", {}).get("time", "")
+                m_time = mgm.get("current", _EMPTY).get("time", "")
                 if "T" in m_time:
-                    from datetime import datetime, timezone, timedelta
                     dt = datetime.fromisoformat(m_time.replace("Z", "+00:00"))
                     m_time = dt.astimezone(timezone(timedelta(hours=3))).strftime("%H:%M")
                 elif " " in m_time:
@@ -542,9 +618,9 @@ def start_bot():
             # --- 天气状况总结 ---
             wx_summary = ""
             # 优先使用 METAR 天气现象
-            metar_wx = metar.get("current", {}).get("wx_desc", "") if metar else ""
-            metar_clouds = metar.get("current", {}).get("clouds", []) if metar else []
-            mgm_cloud = mgm.get("current", {}).get("cloud_cover") if mgm else None
+            metar_wx = metar_cur.get("wx_desc", "")
+            metar_clouds = metar_cur.get("clouds", [])
+            mgm_cloud = mgm.get("current", _EMPTY).get("cloud_cover") if mgm else None
 
             if metar_wx:
                 wx_upper = metar_wx.upper().strip()
@@ -586,13 +662,14 @@ def start_bot():
                     wx_summary = cloud_names.get(mgm_cloud, "")
 
             wx_display = f" {wx_summary}" if wx_summary else ""
-            msg_lines.append(f"\n✈️ <b>实测 ({main_source}): {cur_temp}{temp_symbol}</b>{max_str} |{wx_display} | {obs_t_str}{age_tag}")
+            msg_lines.append("")
+            msg_lines.append(f"✈️ <b>实测 ({main_source}): {cur_temp}{temp_symbol}</b>{max_str} |{wx_display} | {obs_t_str}{age_tag}")
 
 
 
 
             if mgm:
-                m_c = mgm.get("current", {})
+                m_c = mgm.get("current", _EMPTY)
                 # 翻译风向
                 wind_dir = m_c.get("wind_dir")
                 wind_speed_ms = m_c.get("wind_speed_ms")
@@ -631,7 +708,7 @@ def start_bot():
                     msg_lines.append(f"   [MGM] {' | '.join(extra_parts)}")
             
             if metar:
-                m_c = metar.get("current", {})
+                m_c = metar_cur
                 wind = m_c.get("wind_speed_kt")
                 wind_dir = m_c.get("wind_dir")
                 vis = m_c.get("visibility_mi")
@@ -651,14 +728,18 @@ def start_bot():
                     msg_lines.append(f"   {prefix} {cloud_desc} | 👁️ {vis or 10}mi | 💨 {wind or 0}kt")
 
             # --- 5. 态势特征提取 ---
-            feature_str, ai_context = analyze_weather_trend(weather_data, temp_symbol, city_name)
+            feature_str, ai_context = analyze_weather_trend(
+                weather_data, temp_symbol, city_name, risk_profile=risk_profile
+            )
             if feature_str:
                 # 仅将最核心的信息展示给用户作为"态势分析"
                 # 但后面会把更全的数据传给 AI
-                msg_lines.append(f"\n💡 <b>分析</b>:")
+                msg_lines.append("")
+                msg_lines.append("💡 <b>分析</b>:")
                 for line in feature_str.split("\n"):
-                    if line.strip():
-                        msg_lines.append(f"- {line.strip()}")
+                    line = line.strip()
+                    if line:
+                        msg_lines.append(f"- {line}")
 
                 # --- 6. Groq AI 深度分析 ---
                 try:
@@ -666,14 +747,15 @@ def start_bot():
                     # 构建更全的背景数据给 AI
                     
                     # 补充多模型分歧
-                    mm = weather_data.get("multi_model", {})
+                    mm = weather_data.get("multi_model", _EMPTY)
                     if mm.get("forecasts"):
                         mm_str = " | ".join([f"{k}:{v}{temp_symbol}" for k,v in mm["forecasts"].items() if v])
                         ai_context += f"\n模型分歧: {mm_str}"
 
                     ai_result = get_ai_analysis(ai_context, city_name, temp_symbol)
                     if ai_result:
-                        msg_lines.append(f"\n{ai_result}")
+                        msg_lines.append("")
+                        msg_lines.append(ai_result)
                 except Exception as e:
                     logger.error(f"调用 Groq AI 分析失败: {e}")
 
@@ -684,7 +766,23 @@ def start_bot():
             bot.reply_to(message, f"❌ 查询失败: {e}")
 
     logger.info("🤖 Bot 启动中...")
-    bot.infinity_polling()
+    # 轮询异常时指数退避重连（1s, 2s, 4s ... 上限 60s，附带少量抖动）：
+    # 短暂的网络抖动可以很快恢复，持续故障时也不会频繁冲击 Telegram
+    backoff = 1.0
+    while True:
+        started = time.monotonic()
+        try:
+            # getUpdates 长轮询拉满到 Telegram 允许的 50s，空闲时请求次数降到最低
+            bot.polling(non_stop=True, long_polling_timeout=50)
+            break  # stop_polling() 或 Ctrl+C，正常退出
+        except Exception as e:
+            # 上一轮已经稳定运行了一段时间，说明是一次新的故障，退避从头计算
+            if time.monotonic() - started > 60:
+                backoff = 1.0
+            delay = backoff + random.uniform(0, backoff * 0.1)
+            logger.error(f"轮询异常: {e}，{delay:.1f}s 后重连")
+            time.sleep(delay)
+            backoff = min(60.0, backoff * 2)
 
 if __name__ == "__main__":
     start_bot()
@@ -1,6 +1,4 @@
-import subprocess
 import os
-import sys
 from loguru import logger
 
 
@@ -10,12 +8,12 @@ def main():
     # 创建数据目录
     os.makedirs("data", exist_ok=True)
 
-    # 直接运行 bot_listener
-    cmd = [sys.executable, "bot_listener.py"]
+    # 在当前进程内启动 bot_listener（不再额外拉起一个解释器重复加载全部依赖）
+    from bot_listener import start_bot
     logger.success("🚀 已上线！等待 Telegram 指令...")
 
     try:
-        subprocess.run(cmd, cwd=os.getcwd())
+        start_bot()
     except KeyboardInterrupt:
         logger.warning("停止运行...")
 
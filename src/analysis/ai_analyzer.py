@@ -1,6 +1,9 @@
 import os
 import time
+import hashlib
+import threading
 import requests
+from requests.adapters import HTTPAdapter
 from loguru import logger
 
 # 主力模型 + 备用模型（当主力 500 时自动降级）
@@ -9,23 +12,24 @@ MODELS = [
     "llama-3.1-8b-instant",
 ]
 
-def get_ai_analysis(weather_insights: str, city_name: str, temp_symbol: str) -> str:
-    """
-    通过 Groq API (LLaMA 3.3 70B) 对天气态势进行极速交易分析
-    内置自动重试 + 模型降级机制
-    """
-    api_key = os.getenv("GROQ_API_KEY")
-    if not api_key:
-        logger.warning("GROQ_API_KEY 未配置，跳过 AI 分析")
-        return ""
-    
-    url = "https://api.groq.com/openai/v1/chat/completions"
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json"
-    }
-    
-    prompt = f"""
+# 整次分析（含重试和降级）的总耗时上限：AI 结果附在 /city 回复末尾，
+# 不能让多次超时叠加把整条回复拖到一分钟以上
+TOTAL_BUDGET_SEC = 25
+MIN_ATTEMPT_SEC = 3  # 剩余时间不足以完成一次请求时不再尝试
+
+# 复用到 api.groq.com 的长连接，省去每次调用的 TCP+TLS 握手；
+# 重试/降级由下方循环自行控制，连接池不做自动重试
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(pool_connections=2, pool_maxsize=8, max_retries=0))
+
+# 相同输入（城市 + 气象特征）在短时间内重复查询时直接复用上次的分析结果，
+# 省去一次 LLM 往返；键为提示词摘要，值为 (过期时刻, 结果)
+AI_CACHE_TTL = 600  # 秒
+_ai_cache = {}
+_ai_cache_lock = threading.Lock()
+
+# 提示词模板只有城市名和气象特征两处变量，模块加载时构建一次
+_PROMPT_TPL = """
 你是一个专业的天气衍生品（如 Polymarket）交易员。你的任务是分析当前天气特征，判断今日实测最高温是否能达到或超过预报中的【最高值】。
 
 请综合以下提供的【{city_name}】气象特征进行深度推理。
@@ -50,8 +54,36 @@ def get_ai_analysis(weather_insights: str, city_name: str, temp_symbol: str) ->
 - 🎯 置信度: [1-10]/10
 """
 
+def get_ai_analysis(weather_insights: str, city_name: str, temp_symbol: str) -> str:
+    """
+    通过 Groq API (LLaMA 3.3 70B) 对天气态势进行极速交易分析
+    内置自动重试 + 模型降级机制
+    """
+    api_key = os.getenv("GROQ_API_KEY")
+    if not api_key:
+        logger.warning("GROQ_API_KEY 未配置，跳过 AI 分析")
+        return ""
+    
+    url = "https://api.groq.com/openai/v1/chat/completions"
+    headers = {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json"
+    }
+    
+    prompt = _PROMPT_TPL.format(city_name=city_name, weather_insights=weather_insights)
+    cache_key = hashlib.blake2b(prompt.encode("utf-8"), digest_size=16).digest()
+    with _ai_cache_lock:
+        entry = _ai_cache.get(cache_key)
+    if entry and entry[0] > time.monotonic():
+        return entry[1]
+
+    deadline = time.monotonic() + TOTAL_BUDGET_SEC
     for model in MODELS:
         for attempt in range(2):  # 每个模型最多重试 2 次
+            remaining = deadline - time.monotonic()
+            if remaining < MIN_ATTEMPT_SEC:
+                logger.warning(f"Groq 分析已用尽 {TOTAL_BUDGET_SEC}s 时间预算，放弃重试")
+                return "\n⚠️ Groq AI 暂时不可用，请稍后再试"
             try:
                 payload = {
                     "model": model,
@@ -63,7 +95,7 @@ def get_ai_analysis(weather_insights: str, city_name: str, temp_symbol: str) ->
                     "max_tokens": 250
                 }
 
-                response = requests.post(url, json=payload, headers=headers, timeout=15)
+                response = _SESSION.post(url, json=payload, headers=headers, timeout=min(15, remaining))
                 response.raise_for_status()
                 
                 result = response.json()
@@ -71,11 +103,18 @@ def get_ai_analysis(weather_insights: str, city_name: str, temp_symbol: str) ->
                 
                 if model != MODELS[0]:
                     logger.info(f"Groq 降级到备用模型 {model} 成功")
+                now = time.monotonic()
+                with _ai_cache_lock:
+                    # 写入时顺带清掉已过期的条目，避免缓存无限增长
+                    expired = [k for k, (expires, _) in _ai_cache.items() if expires <= now]
+                    for k in expired:
+                        del _ai_cache[k]
+                    _ai_cache[cache_key] = (now + AI_CACHE_TTL, content)
                 return content
                 
             except requests.exceptions.HTTPError as e:
                 status = e.response.status_code if e.response is not None else 0
-                if status in (500, 502, 503) and attempt == 0:
+                if status in (500, 502, 503) and attempt == 0 and deadline - time.monotonic() > 1.5 + MIN_ATTEMPT_SEC:
                     logger.warning(f"Groq {model} 返回 {status}，{1.5}s 后重试...")
                     time.sleep(1.5)
                     continue
@@ -1,49 +1,139 @@
 import os
-import json
+import heapq
+import queue
+import atexit
 import logging
+import threading
 from datetime import datetime, timedelta
+from operator import itemgetter
 
 import fcntl
 
+import orjson  # 解析/序列化速度约为标准库 json 的 3-5 倍
+
 # Simple memory cache to avoid blasting the disk if queried 10 times a minute
+# filepath -> (st_mtime_ns, parsed data)；按路径分别缓存，mtime 变化才重新解析
 _history_cache = {}
-_history_mtime = 0
+# 上次清理过期记录时使用的截止日期；截止日期每天才变一次，同一天内无需重复遍历
+_last_cleanup_cutoff = None
+
+# 后台写盘：处理器线程只负责序列化并入队，落盘由单独线程完成，不阻塞回复用户
+_write_queue = queue.Queue()
+_writer_thread = None
+_writer_start_lock = threading.Lock()
+_WRITER_STOP = object()  # 退出时入队的哨兵，写线程处理完之前的请求后结束
+_EXIT_FLUSH_TIMEOUT_SEC = 5  # 退出时最多等待写盘这么久，写盘卡住也不阻塞进程退出
 
 def load_history(filepath):
-    global _history_cache, _history_mtime
-    if not os.path.exists(filepath):
-        return {}
-        
     try:
-        current_mtime = os.path.getmtime(filepath)
-        if current_mtime == _history_mtime and _history_cache:
-            return _history_cache
-            
-        with open(filepath, 'r', encoding='utf-8') as f:
-            # We don't strictly need a lock for reading in Python if the write is atomic,
-            # but using one prevents reading half-written JSONs.
+        # 一次 stat 同时完成"是否存在"和"是否变更"两项检查
+        current_mtime = os.stat(filepath).st_mtime_ns
+    except FileNotFoundError:
+        # 首次写入可能还在后台队列中，尚未落盘时先返回内存中的数据
+        cached = _history_cache.get(filepath)
+        return cached[1] if cached is not None else {}
+
+    cached = _history_cache.get(filepath)
+    if cached is not None and cached[0] == current_mtime:
+        return cached[1]
+
+    try:
+        with open(filepath, 'rb') as f:
+            # save_history 通过 os.replace 原子替换，读方不会读到半截文件；
+            # 共享锁保留给仍按原地写入方式修改该文件的外部脚本
             fcntl.flock(f, fcntl.LOCK_SH)
-            data = json.load(f)
+            data = orjson.loads(f.read())
             fcntl.flock(f, fcntl.LOCK_UN)
             
-            _history_cache = data
-            _history_mtime = current_mtime
+            _history_cache[filepath] = (current_mtime, data)
             return data
     except Exception as e:
         print(f"Error loading history: {e}")
-        return _history_cache if _history_cache else {}
+        return cached[1] if cached is not None else {}
+
+def _write_history_file(filepath, payload, data):
+    # 先写同目录临时文件再 os.replace 原子替换：读方永远看到完整的旧文件或新文件，
+    # 不会再读到 'w' 截断后尚未写完的半截 JSON
+    # 临时文件名带进程/线程号，多线程同时保存互不覆盖；普通 open 创建，权限仍按 umask
+    tmp_path = f"{filepath}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp_path, filepath)
+        tmp_path = None
+        # 只在缓存里仍是刚写入的这份数据时刷新 mtime；若期间已有读方缓存了更新的对象，
+        # 不能用这份旧对象覆盖回去，否则后续修改会基于旧数据而丢失记录
+        cur = _history_cache.get(filepath)
+        if cur is not None and cur[1] is data:
+            _history_cache[filepath] = (os.stat(filepath).st_mtime_ns, data)
+    except Exception as e:
+        print(f"Error saving history: {e}")
+    finally:
+        if tmp_path is not None:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+def _history_writer():
+    while True:
+        items = [_write_queue.get()]
+        try:
+            # 积压的写请求合并：同一文件只写最新的一份
+            while True:
+                try:
+                    items.append(_write_queue.get_nowait())
+                except queue.Empty:
+                    break
+            latest = {}
+            stop = False
+            for item in items:
+                if item is _WRITER_STOP:
+                    stop = True
+                    continue
+                filepath, payload, data = item
+                latest[filepath] = (payload, data)
+            for filepath, (payload, data) in latest.items():
+                try:
+                    _write_history_file(filepath, payload, data)
+                except Exception as e:
+                    # 单次写盘失败不能让写线程退出，否则后续保存全部丢失
+                    print(f"Error saving history: {e}")
+        finally:
+            for _ in items:
+                _write_queue.task_done()
+        if stop:
+            return
+
+def _flush_on_exit():
+    # 哨兵排在所有待写请求之后；限时等待，写线程已退出或写盘卡住时也能正常退出
+    _write_queue.put(_WRITER_STOP)
+    _writer_thread.join(timeout=_EXIT_FLUSH_TIMEOUT_SEC)
+
+def _ensure_writer():
+    global _writer_thread
+    if _writer_thread is not None:
+        return
+    with _writer_start_lock:
+        if _writer_thread is None:
+            thread = threading.Thread(target=_history_writer, name="deb-history-writer", daemon=True)
+            thread.start()
+            _writer_thread = thread
+            # 进程退出前把队列里剩余的更新写完，避免丢失最后一次更新
+            atexit.register(_flush_on_exit)
 
 def save_history(filepath, data):
-    global _history_cache, _history_mtime
-    _history_cache = data
+    # 在调用线程里序列化，得到当下的数据快照；之后 data 再被修改也不影响这次写入
     try:
-        with open(filepath, 'w', encoding='utf-8') as f:
-            fcntl.flock(f, fcntl.LOCK_EX)
-            json.dump(data, f, ensure_ascii=False, indent=2)
-            fcntl.flock(f, fcntl.LOCK_UN)
-        _history_mtime = os.path.getmtime(filepath)
+        # orjson 直接输出 UTF-8 字节且不转义非 ASCII，与 ensure_ascii=False 一致
+        payload = orjson.dumps(data, option=orjson.OPT_INDENT_2)
     except Exception as e:
         print(f"Error saving history: {e}")
+        return
+    cached = _history_cache.get(filepath)
+    _history_cache[filepath] = (cached[0] if cached is not None else None, data)
+    _ensure_writer()
+    _write_queue.put((filepath, payload, data))
 
 def update_daily_record(city_name, date_str, forecasts, actual_high):
     """
@@ -55,27 +145,25 @@ def update_daily_record(city_name, date_str, forecasts, actual_high):
     history_file = os.path.join(project_root, 'data', 'daily_records.json')
     
     data = load_history(history_file)
-    if city_name not in data:
-        data[city_name] = {}
-        
-    if date_str not in data[city_name]:
-        data[city_name][date_str] = {}
+    record = data.setdefault(city_name, {}).setdefault(date_str, {})
     
     # 避免无意义的频繁磁盘写入：如果数据没有变化，直接返回
-    old_actual = data[city_name][date_str].get('actual_high')
-    if old_actual == actual_high and data[city_name][date_str].get('forecasts') == forecasts:
+    if record.get('actual_high') == actual_high and record.get('forecasts') == forecasts:
         return
     
-    data[city_name][date_str]['forecasts'] = forecasts
+    record['forecasts'] = forecasts
     # 只要仍在更新或者已经结束，都记录最新高点
-    data[city_name][date_str]['actual_high'] = actual_high
+    record['actual_high'] = actual_high
     
     # 自动清理：只保留最近 14 天的记录（DEB 只用 7 天，14 天留足余量）
+    global _last_cleanup_cutoff
     cutoff = (datetime.now() - timedelta(days=14)).strftime("%Y-%m-%d")
-    for city in list(data.keys()):
-        old_dates = [d for d in data[city] if d < cutoff]
-        for d in old_dates:
-            del data[city][d]
+    if cutoff != _last_cleanup_cutoff:
+        for city in list(data.keys()):
+            old_dates = [d for d in data[city] if d < cutoff]
+            for d in old_dates:
+                del data[city][d]
+        _last_cleanup_cutoff = cutoff
     
     save_history(history_file, data)
 
@@ -102,12 +190,15 @@ def calculate_dynamic_weights(city_name, current_forecasts, lookback_days=7):
     
     # 我们只用真正结清（或者有比较准确最高温）的历史来算误差
     # 这边简化：凡是有 actual_high 的都算进去
-    errors = {model: [] for model in current_forecasts.keys()}
+    # 每个模型只累计 [样本数, 绝对误差和]，无需保存完整误差列表
+    errors = {model: [0, 0.0] for model in current_forecasts.keys()}
     
+    # 今天的日期在整个循环中不变，只取一次时钟
+    today_str = datetime.now().strftime("%Y-%m-%d")
     days_used = 0
     for date_str in sorted_dates:
         # 跳过今天，今天还没出最终结果
-        if date_str == datetime.now().strftime("%Y-%m-%d"):
+        if date_str == today_str:
             continue
             
         record = city_data[date_str]
@@ -118,8 +209,11 @@ def calculate_dynamic_weights(city_name, current_forecasts, lookback_days=7):
             continue
             
         for model in current_forecasts.keys():
-            if model in past_forecasts and past_forecasts[model] is not None:
-                errors[model].append(abs(past_forecasts[model] - actual))
+            past_val = past_forecasts.get(model)
+            if past_val is not None:
+                acc = errors[model]
+                acc[0] += 1
+                acc[1] += abs(past_val - actual)
                 
         days_used += 1
         if days_used >= lookback_days:
@@ -133,9 +227,9 @@ def calculate_dynamic_weights(city_name, current_forecasts, lookback_days=7):
         
     # 计算 MAE
     maes = {}
-    for model, err_list in errors.items():
-        if err_list:
-            maes[model] = sum(err_list) / len(err_list)
+    for model, (count, err_sum) in errors.items():
+        if count:
+            maes[model] = err_sum / count
         else:
             # 如果某个新模型没有历史数据，给它一个平均误差
             maes[model] = 2.0 
@@ -154,10 +248,10 @@ def calculate_dynamic_weights(city_name, current_forecasts, lookback_days=7):
     for m in weights.keys():
         blended_high += current_forecasts[m] * weights[m]
         
-    # 格式化权重信息，挑选前权重最高的2-3个模型展示
-    sorted_models = sorted(weights.items(), key=lambda x: x[1], reverse=True)
+    # 格式化权重信息，挑选前权重最高的2-3个模型展示（nlargest 取 Top-3，无需全量排序）
+    top_models = heapq.nlargest(3, weights.items(), key=itemgetter(1))
     weight_str_parts = []
-    for m, w in sorted_models[:3]:
+    for m, w in top_models:
          weight_str_parts.append(f"{m}({w*100:.0f}%,MAE:{maes[m]:.1f}°)")
          
     return round(blended_high, 1), " | ".join(weight_str_parts)
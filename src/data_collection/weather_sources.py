@@ -1,9 +1,103 @@
 import requests
+from requests.adapters import HTTPAdapter
+import os
 import re
 import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from typing import Optional, Dict, List
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from loguru import logger
+import orjson  # 大体积预报 JSON 的解析速度约为标准库的 3-5 倍
+
+
+# METAR 原始报文中的观测时间组，如 "271150Z" → 27日 11:50 UTC
+_RAWOB_TIME_RE = re.compile(r"\b(\d{2})(\d{2})(\d{2})Z\b")
+
+
+# 标题日期解析用的正则，模块加载时编译一次
+# 英文月份按 1~12 月顺序逐个尝试（与原先遍历 dict 的优先级一致）
+_MONTH_PATTERNS = [
+    (month_name, f"{i:02d}", re.compile(rf"{month_name}\s+(\d+)"))
+    for i, month_name in enumerate(
+        ["January", "February", "March", "April", "May", "June",
+         "July", "August", "September", "October", "November", "December"],
+        start=1,
+    )
+]
+_ZH_DATE_RE = re.compile(r"(\d{1,2})月(\d{1,2})日")
+_ISO_DATE_RE = re.compile(r"(\d{4})-(\d{2})-(\d{2})")
+
+
+# 已知城市别名 -> 标准城市名（按插入顺序匹配，顺序即优先级）
+_KNOWN_CITIES = {
+    "london": "London", "伦敦": "London",
+    "new york": "New York", "new york's central park": "New York", "nyc": "New York", "纽约": "New York",
+    "seattle": "Seattle", "西雅图": "Seattle",
+    "chicago": "Chicago", "芝加哥": "Chicago",
+    "dallas": "Dallas", "达拉斯": "Dallas",
+    "miami": "Miami", "迈阿密": "Miami",
+    "atlanta": "Atlanta", "亚特兰大": "Atlanta",
+    "seoul": "Seoul", "首尔": "Seoul",
+    "toronto": "Toronto", "多伦多": "Toronto",
+    "ankara": "Ankara", "安卡拉": "Ankara",
+    "wellington": "Wellington", "惠灵顿": "Wellington",
+    "buenos aires": "Buenos Aires", "布宜诺斯艾利斯": "Buenos Aires"
+}
+
+
+@lru_cache(maxsize=4096)
+def _extract_date_from_title(title: str, year: int) -> Optional[str]:
+    """extract_date_from_title 的纯函数实现：同一标题会被反复解析，按 (标题, 年份) 缓存"""
+    # 1. 尝试英文月份
+    for month_name, month_val, month_re in _MONTH_PATTERNS:
+        if month_name in title:
+            match = month_re.search(title)
+            if match:
+                day = int(match.group(1))
+                return f"{year}-{month_val}-{day:02d}"
+
+    # 2. 尝试中文格式 "2月7日" 或 "02月07日"（先用廉价的字符判断跳过无关标题）
+    if "月" in title:
+        zh_match = _ZH_DATE_RE.search(title)
+        if zh_match:
+            month = int(zh_match.group(1))
+            day = int(zh_match.group(2))
+            return f"{year}-{month:02d}-{day:02d}"
+
+    # 3. 尝试 ISO 格式 YYYY-MM-DD
+    if "-" in title:
+        iso_match = _ISO_DATE_RE.search(title)
+        if iso_match:
+            return iso_match.group(0)
+
+    return None
+
+
+@lru_cache(maxsize=4096)
+def _extract_city_from_question(question: str) -> Optional[str]:
+    """extract_city_from_question 的纯函数实现：相同问题文本直接命中缓存"""
+    q = question.lower()
+
+    # 1. 优先尝试已知城市列表 (硬编码匹配)
+    for key, val in _KNOWN_CITIES.items():
+        if key in q:
+            return val
+
+    # 2. 从英文模板中提取
+    triggers = ["temperature in ", "temp in ", "weather in ", "highest-temperature-in-", "temperature-in-"]
+    for trigger in triggers:
+        if trigger in q:
+            part = q.split(trigger)[1]
+            delimiters = [" on ", " at ", " above ", " below ", " be ", " is ", " will ", " has ", " reached ", "?", " (", ", ", "-"]
+            city = part
+            for d in delimiters:
+                if d in city:
+                    city = city.split(d)[0]
+            return city.strip().title()
+
+    return None
 
 
 class WeatherDataCollector:
@@ -36,6 +130,58 @@ class WeatherDataCollector:
         "paris": "LFPG",  # Charles de Gaulle
     }
 
+    # 坐标使用 METAR 机场位置（Polymarket 以机场数据结算），类常量只构建一次
+    STATIC_COORDS = {
+        "london": {"lat": 51.5053, "lon": 0.0553},        # EGLC London City
+        "paris": {"lat": 49.0097, "lon": 2.5478},         # LFPG Charles de Gaulle
+        "new york": {"lat": 40.7750, "lon": -73.8750},    # KLGA LaGuardia
+        "new york's central park": {"lat": 40.7812, "lon": -73.9665},
+        "nyc": {"lat": 40.7750, "lon": -73.8750},         # KLGA LaGuardia
+        "seattle": {"lat": 47.4499, "lon": -122.3118},    # KSEA Sea-Tac
+        "chicago": {"lat": 41.9769, "lon": -87.9081},     # KORD O'Hare
+        "dallas": {"lat": 32.8459, "lon": -96.8509},      # KDAL Love Field
+        "miami": {"lat": 25.7933, "lon": -80.2906},       # KMIA International
+        "atlanta": {"lat": 33.6367, "lon": -84.4281},     # KATL Hartsfield-Jackson
+        "seoul": {"lat": 37.4691, "lon": 126.4510},       # RKSI Incheon
+        "toronto": {"lat": 43.6759, "lon": -79.6294},     # CYYZ Pearson
+        "ankara": {"lat": 40.1281, "lon": 32.9950},       # LTAC Esenboğa
+        "wellington": {"lat": -41.3272, "lon": 174.8053}, # NZWN Wellington
+        "buenos aires": {"lat": -34.8222, "lon": -58.5358}, # SAEZ Ezeiza
+    }
+
+    # 美国市场城市（使用华氏度），类常量只构建一次
+    US_CITIES = frozenset(
+        {
+            "dallas",
+            "nyc",
+            "new york",
+            "seattle",
+            "miami",
+            "atlanta",
+            "chicago",
+            "los angeles",
+            "san francisco",
+            "washington",
+            "boston",
+            "houston",
+            "phoenix",
+            "philadelphia",
+            "new york's central park",
+            "portland",
+            "denver",
+            "austin",
+            "san diego",
+            "detroit",
+            "cleveland",
+            "minneapolis",
+            "st. louis",
+        }
+    )
+
+    # 集合/多模型预报按模型起报周期更新（数小时一次），短时间内重复查询直接复用；
+    # METAR 实测保持零缓存
+    MODEL_CACHE_TTL = 300  # 秒
+
     def __init__(self, config: dict):
         self.config = config
         weather_cfg = config.get("weather", {})
@@ -44,6 +190,23 @@ class WeatherDataCollector:
 
         self.timeout = 30  # 增加超时以支持高延迟 VPS
         self.session = requests.Session()
+        # 并发查询时同一主机会有多个请求在途（如 Open-Meteo 预报 + 多模型），
+        # 默认每主机只保留 10 条连接，超出的用完即丢，下次又要重新 TLS 握手
+        adapter = HTTPAdapter(pool_connections=10, pool_maxsize=16)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        # fetch_all_sources 用于并发请求各数据源
+        self._executor = ThreadPoolExecutor(max_workers=6, thread_name_prefix="weather-fetch")
+        # 数据源内部的子请求单独用一个池：若提交回上面的池，池被占满时会互相等待而死锁
+        self._sub_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="weather-sub")
+        # (数据源, lat, lon, 是否华氏) -> (过期时间, 结果)；bot 多线程共享，需加锁
+        self._model_cache = {}
+        self._model_cache_lock = threading.Lock()
+        # 地理编码结果持久化到磁盘（坐标不会变），重启后冷启动无需再请求 Geocoding API
+        project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        self._location_cache_path = os.path.join(project_root, "data", "location_cache.json")
+        self._location_cache = self._load_location_cache()
+        self._location_cache_lock = threading.Lock()
 
         # 设置代理
         proxy = config.get("proxy")
@@ -55,6 +218,59 @@ class WeatherDataCollector:
 
         logger.info("天气数据采集器初始化完成。")
 
+    def _get_cached_model(self, key: tuple) -> Optional[Dict]:
+        with self._model_cache_lock:
+            entry = self._model_cache.get(key)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+        return None
+
+    def _set_cached_model(self, key: tuple, result: Dict) -> None:
+        now = time.monotonic()
+        with self._model_cache_lock:
+            # 写入时顺带清掉已过期的条目，查询过的城市再多缓存也不会无限增长
+            expired = [k for k, (expires, _) in self._model_cache.items() if expires <= now]
+            for k in expired:
+                del self._model_cache[k]
+            self._model_cache[key] = (now + self.MODEL_CACHE_TTL, result)
+
+    def _load_location_cache(self) -> Dict:
+        try:
+            with open(self._location_cache_path, "rb") as f:
+                raw = f.read()
+            data = orjson.loads(raw)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning(f"读取地理编码缓存失败: {e}")
+            return {}
+        # 文件内容是合法 JSON 但不是对象（列表/字符串等）时视为损坏，避免后续 .get 抛错
+        if not isinstance(data, dict):
+            logger.warning("地理编码缓存格式异常，已忽略")
+            return {}
+        return data
+
+    def _save_location(self, key: str, coords: Dict) -> None:
+        """记录一条地理编码结果，并以临时文件 + os.replace 原子写回磁盘"""
+        with self._location_cache_lock:
+            self._location_cache[key] = coords
+            tmp_path = f"{self._location_cache_path}.{os.getpid()}.tmp"
+            try:
+                os.makedirs(os.path.dirname(self._location_cache_path), exist_ok=True)
+                payload = orjson.dumps(self._location_cache, option=orjson.OPT_INDENT_2)
+                with open(tmp_path, "wb") as f:
+                    f.write(payload)
+                os.replace(tmp_path, self._location_cache_path)
+                tmp_path = None
+            except Exception as e:
+                logger.warning(f"保存地理编码缓存失败: {e}")
+            finally:
+                if tmp_path is not None:
+                    try:
+                        os.remove(tmp_path)
+                    except OSError:
+                        pass
+
     def fetch_from_openweather(self, city: str, country: str = None) -> Optional[Dict]:
         """
         Fetch current weather and forecast from OpenWeatherMap
@@ -80,7 +296,7 @@ class WeatherDataCollector:
                 timeout=self.timeout,
             )
             current_response.raise_for_status()
-            current_data = current_response.json()
+            current_data = orjson.loads(current_response.content)
 
             # 5-day forecast
             forecast_url = "https://api.openweathermap.org/data/2.5/forecast"
@@ -90,7 +306,7 @@ class WeatherDataCollector:
                 timeout=self.timeout,
             )
             forecast_response.raise_for_status()
-            forecast_data = forecast_response.json()
+            forecast_data = orjson.loads(forecast_response.content)
 
             return {
                 "source": "openweathermap",
@@ -147,10 +363,11 @@ class WeatherDataCollector:
             return None
 
         # Default to last 30 days if no dates provided
+        now = datetime.now()
         if not end_date:
-            end_date = datetime.now().strftime("%Y-%m-%d")
+            end_date = now.strftime("%Y-%m-%d")
         if not start_date:
-            start_date = (datetime.now() - timedelta(days=30)).strftime("%Y-%m-%d")
+            start_date = (now - timedelta(days=30)).strftime("%Y-%m-%d")
 
         try:
             url = f"https://weather.visualcrossing.com/VisualCrossingWebServices/rest/services/timeline/{city}/{start_date}/{end_date}"
@@ -165,7 +382,7 @@ class WeatherDataCollector:
                 timeout=self.timeout,
             )
             response.raise_for_status()
-            data = response.json()
+            data = orjson.loads(response.content)
 
             return {
                 "source": "visualcrossing",
@@ -243,7 +460,7 @@ class WeatherDataCollector:
             )
             response.raise_for_status()
 
-            data = response.json()
+            data = orjson.loads(response.content)
             if not data:
                 return None
 
@@ -257,8 +474,7 @@ class WeatherDataCollector:
             def _parse_rawob_time(obs):
                 """从 rawOb 中提取精确的 UTC 观测时间"""
                 raw = obs.get("rawOb", "")
-                import re as _re
-                m = _re.search(r'\b(\d{2})(\d{2})(\d{2})Z\b', raw)
+                m = _RAWOB_TIME_RE.search(raw)
                 if m:
                     day, hour, minute = int(m.group(1)), int(m.group(2)), int(m.group(3))
                     # 用 reportTime 的日期部分 + rawOb 的时分
@@ -272,7 +488,7 @@ class WeatherDataCollector:
                         if result > base_dt + timedelta(hours=2):
                             result -= timedelta(days=1)
                         return result
-                    except:
+                    except (AttributeError, TypeError, ValueError):
                         pass
                 # fallback 到 reportTime
                 fallback = obs.get("reportTime", "")
@@ -280,14 +496,15 @@ class WeatherDataCollector:
                     clean = fallback.replace(" ", "T")
                     if not clean.endswith("Z"): clean += "Z"
                     return datetime.fromisoformat(clean.replace("Z", "+00:00"))
-                except:
+                except (AttributeError, TypeError, ValueError):
                     return None
             
-            obs_dt = _parse_rawob_time(latest)
+            # 每条报文的观测时间只解析一次，下面求最高温和取最近温度时复用
+            obs_times = [_parse_rawob_time(obs) for obs in data]
+            obs_dt = obs_times[0]
             obs_time = obs_dt.strftime("%Y-%m-%dT%H:%M:%S.000Z") if obs_dt else latest.get("reportTime", "")
 
-            # 2. 精确计算"当地今天"的最高温
-            from datetime import timezone, timedelta
+            # 2. 精确计算"当地今天"的最高温（本次调用只取一次时钟，返回的 timestamp 也复用它）
             now_utc = datetime.now(timezone.utc)
             local_now = now_utc + timedelta(seconds=utc_offset)
             local_midnight = local_now.replace(hour=0, minute=0, second=0, microsecond=0)
@@ -295,8 +512,7 @@ class WeatherDataCollector:
 
             max_so_far_c = -999
             max_temp_time = None
-            for obs in data:
-                obs_dt_iter = _parse_rawob_time(obs)
+            for obs, obs_dt_iter in zip(data, obs_times):
                 if obs_dt_iter is None:
                     continue
                 try:
@@ -306,15 +522,14 @@ class WeatherDataCollector:
                             max_so_far_c = t
                             local_report = obs_dt_iter + timedelta(seconds=utc_offset)
                             max_temp_time = local_report.strftime("%H:%M")
-                except:
+                except (TypeError, ValueError):
                     continue
 
             # 3. 提取最近 4 条报文的温度（用于趋势分析）
             recent_temps_raw = []  # [(local_time_str, temp_c), ...]
-            for obs in data[:4]:  # data 已按时间倒序
+            for obs, obs_dt_iter in zip(data[:4], obs_times):  # data 已按时间倒序
                 obs_temp = obs.get("temp")
                 if obs_temp is not None:
-                    obs_dt_iter = _parse_rawob_time(obs)
                     if obs_dt_iter:
                         local_rt = obs_dt_iter + timedelta(seconds=utc_offset)
                         recent_temps_raw.append((local_rt.strftime("%H:%M"), obs_temp))
@@ -338,7 +553,7 @@ class WeatherDataCollector:
                 "source": "metar",
                 "icao": icao,
                 "station_name": latest.get("name", icao),
-                "timestamp": datetime.utcnow().isoformat(),
+                "timestamp": now_utc.replace(tzinfo=None).isoformat(),
                 "observation_time": obs_time,
                 "current": {
                     "temp": round(temp, 1) if temp is not None else None,
@@ -384,15 +599,17 @@ class WeatherDataCollector:
         results = {}
         
         try:
+            # 每日预报与实时数据互不依赖，先把预报请求发出去
+            forecast_future = self._sub_executor.submit(self._fetch_mgm_daily, base_url, istno, headers)
+
             # 1. 实时数据 (添加时间戳防止 CDN 缓存)
-            import time
             obs_resp = self.session.get(
                 f"{base_url}/sondurumlar?istno={istno}&_={int(time.time()*1000)}", 
                 headers=headers, 
                 timeout=self.timeout
             )
             if obs_resp.status_code == 200:
-                data = obs_resp.json()
+                data = orjson.loads(obs_resp.content)
                 if data:
                     latest = data[0] if isinstance(data, list) else data
                     # MGM 数据字段映射
@@ -418,39 +635,42 @@ class WeatherDataCollector:
                         "station_name": latest.get("istasyonAd") or latest.get("adi") or latest.get("merkezAd") or "Ankara Esenboğa"
                     }
             
-            # 2. 每日预报（尝试两个可能的 API 路径）
-            forecast_urls = [
-                f"{base_url}/tahminler/gunluk?istno={istno}",
-                f"https://servis.mgm.gov.tr/api/tahminler/gunluk?istno={istno}",
-            ]
-            for forecast_url in forecast_urls:
-                try:
-                    daily_resp = self.session.get(forecast_url, headers=headers, timeout=self.timeout)
-                    if daily_resp.status_code == 200:
-                        forecasts = daily_resp.json()
-                        if forecasts and isinstance(forecasts, list):
-                            today = forecasts[0]
-                            high_val = today.get("enYuksekGun1")
-                            low_val = today.get("enDusukGun1")
-                            if high_val is not None:
-                                results["today_high"] = high_val
-                                results["today_low"] = low_val
-                                logger.info(f"📋 MGM 每日预报: 最高 {high_val}°C, 最低 {low_val}°C (from {forecast_url})")
-                                break
-                            else:
-                                # 记录所有可用字段，方便调试
-                                available_keys = [k for k in today.keys() if "yuksek" in k.lower() or "sicaklik" in k.lower() or "gun" in k.lower()]
-                                logger.warning(f"MGM 每日预报: enYuksekGun1 为空，可用字段: {available_keys}")
-                    else:
-                        logger.debug(f"MGM forecast URL {forecast_url} returned {daily_resp.status_code}")
-                except Exception as e:
-                    logger.debug(f"MGM forecast URL {forecast_url} failed: {e}")
+            # 2. 每日预报（已与实时数据并发请求）
+            results.update(forecast_future.result())
             
             return results if "current" in results else None
         except Exception as e:
             logger.error(f"MGM API 请求失败 ({istno}): {e}")
             return None
 
+    def _fetch_mgm_daily(self, base_url: str, istno: str, headers: Dict) -> Dict:
+        """MGM 每日预报（尝试两个可能的 API 路径），返回 today_high / today_low，失败返回空 dict"""
+        forecast_urls = [
+            f"{base_url}/tahminler/gunluk?istno={istno}",
+            f"https://servis.mgm.gov.tr/api/tahminler/gunluk?istno={istno}",
+        ]
+        for forecast_url in forecast_urls:
+            try:
+                daily_resp = self.session.get(forecast_url, headers=headers, timeout=self.timeout)
+                if daily_resp.status_code == 200:
+                    forecasts = orjson.loads(daily_resp.content)
+                    if forecasts and isinstance(forecasts, list):
+                        today = forecasts[0]
+                        high_val = today.get("enYuksekGun1")
+                        low_val = today.get("enDusukGun1")
+                        if high_val is not None:
+                            logger.info(f"📋 MGM 每日预报: 最高 {high_val}°C, 最低 {low_val}°C (from {forecast_url})")
+                            return {"today_high": high_val, "today_low": low_val}
+                        else:
+                            # 记录所有可用字段，方便调试
+                            available_keys = [k for k in today.keys() if "yuksek" in k.lower() or "sicaklik" in k.lower() or "gun" in k.lower()]
+                            logger.warning(f"MGM 每日预报: enYuksekGun1 为空，可用字段: {available_keys}")
+                else:
+                    logger.debug(f"MGM forecast URL {forecast_url} returned {daily_resp.status_code}")
+            except Exception as e:
+                logger.debug(f"MGM forecast URL {forecast_url} failed: {e}")
+        return {}
+
     def fetch_nws(self, lat: float, lon: float) -> Optional[Dict]:
         """
         从 NWS (美国国家气象局) 获取高精度预报
@@ -463,7 +683,7 @@ class WeatherDataCollector:
             
             points_resp = self.session.get(points_url, headers=headers, timeout=self.timeout)
             points_resp.raise_for_status()
-            points_data = points_resp.json()
+            points_data = orjson.loads(points_resp.content)
             
             forecast_url = points_data.get("properties", {}).get("forecast")
             if not forecast_url:
@@ -472,24 +692,26 @@ class WeatherDataCollector:
             # 2. 获取预报
             forecast_resp = self.session.get(forecast_url, headers=headers, timeout=self.timeout)
             forecast_resp.raise_for_status()
-            forecast_data = forecast_resp.json()
+            forecast_data = orjson.loads(forecast_resp.content)
             
             periods = forecast_data.get("properties", {}).get("periods", [])
             if not periods:
                 return None
             
-            # 3. 提取今日最高温（找 isDaytime=True 的第一个）
+            # 3. 提取今日最高温（找 isDaytime=True 的第一个），单次遍历
             today_high = None
+            first_daytime = None
             for p in periods:
-                if p.get("isDaytime") and "High" in p.get("name", ""):
+                if not p.get("isDaytime"):
+                    continue
+                if first_daytime is None:
+                    first_daytime = p
+                if "High" in p.get("name", ""):
                     today_high = p.get("temperature")
                     break
             # 如果没有明确的 High，取第一个 daytime 的温度
-            if today_high is None:
-                for p in periods:
-                    if p.get("isDaytime"):
-                        today_high = p.get("temperature")
-                        break
+            if today_high is None and first_daytime is not None:
+                today_high = first_daytime.get("temperature")
             
             return {
                 "source": "nws",
@@ -542,7 +764,7 @@ class WeatherDataCollector:
                 timeout=self.timeout,
             )
             response.raise_for_status()
-            data = response.json()
+            data = orjson.loads(response.content)
 
             current = data.get("current_weather", {})
             utc_offset = data.get("utc_offset_seconds", 0)
@@ -584,7 +806,8 @@ class WeatherDataCollector:
             # 计算精确的当地时间
             now_utc = datetime.utcnow()
             local_now = now_utc + timedelta(seconds=utc_offset)
-            local_time_str = local_now.strftime("%Y-%m-%d %H:%M")
+            local_date_str = local_now.strftime("%Y-%m-%d")
+            local_hm_str = local_now.strftime("%H:%M")
 
             return {
                 "source": "open-meteo",
@@ -593,7 +816,9 @@ class WeatherDataCollector:
                 "utc_offset": utc_offset,
                 "current": {
                     "temp": current.get("temperature"),
-                    "local_time": local_time_str,
+                    "local_time": f"{local_date_str} {local_hm_str}",
+                    "local_date": local_date_str,  # 预拆分，调用方无需再 split
+                    "local_hm": local_hm_str,
                 },
                 "hourly": hourly_data,
                 "daily": daily_data,
@@ -613,6 +838,12 @@ class WeatherDataCollector:
         从 Open-Meteo Ensemble API 获取 51 成员集合预报
         用于计算预报不确定性范围（散度）
         """
+        # 集合预报每几小时才更新一次，允许 MODEL_CACHE_TTL 内的陈旧度：
+        # 进程内缓存命中即返回，请求本身也不再附加防缓存参数
+        cache_key = ("ensemble", lat, lon, use_fahrenheit)
+        cached = self._get_cached_model(cache_key)
+        if cached:
+            return cached
         try:
             url = "https://ensemble-api.open-meteo.com/v1/ensemble"
             params = {
@@ -621,7 +852,6 @@ class WeatherDataCollector:
                 "daily": "temperature_2m_max",
                 "timezone": "auto",
                 "forecast_days": 3,
-                "_t": int(time.time()),
             }
             if use_fahrenheit:
                 params["temperature_unit"] = "fahrenheit"
@@ -631,11 +861,10 @@ class WeatherDataCollector:
             response = self.session.get(
                 url,
                 params=params,
-                headers={"Cache-Control": "no-cache"},
                 timeout=self.timeout,
             )
             response.raise_for_status()
-            data = response.json()
+            data = orjson.loads(response.content)
 
             daily = data.get("daily", {})
             # 每个成员都会返回一组 temperature_2m_max
@@ -681,6 +910,7 @@ class WeatherDataCollector:
                 f"📊 Ensemble ({n} members): median={median:.1f}, "
                 f"p10={p10:.1f}, p90={p90:.1f}"
             )
+            self._set_cached_model(cache_key, result)
             return result
         except Exception as e:
             logger.warning(f"Ensemble API 请求失败: {e}")
@@ -705,6 +935,10 @@ class WeatherDataCollector:
         
         返回 3 天的预报数据，支持今日+明日共识分析
         """
+        cache_key = ("multi_model", lat, lon, use_fahrenheit)
+        cached = self._get_cached_model(cache_key)
+        if cached:
+            return cached
         try:
             url = "https://api.open-meteo.com/v1/forecast"
             models = "ecmwf_ifs025,gfs_seamless,icon_seamless,gem_seamless,jma_seamless"
@@ -715,7 +949,6 @@ class WeatherDataCollector:
                 "models": models,
                 "timezone": "auto",
                 "forecast_days": 3,
-                "_t": int(time.time()),
             }
             if use_fahrenheit:
                 params["temperature_unit"] = "fahrenheit"
@@ -723,11 +956,10 @@ class WeatherDataCollector:
             response = self.session.get(
                 url,
                 params=params,
-                headers={"Cache-Control": "no-cache"},
                 timeout=self.timeout,
             )
             response.raise_for_status()
-            data = response.json()
+            data = orjson.loads(response.content)
 
             daily = data.get("daily", {})
             dates = daily.get("time", [])
@@ -763,13 +995,15 @@ class WeatherDataCollector:
             labels_str = ", ".join([f"{k}={v}" for k, v in forecasts.items()])
             logger.info(f"🔬 Multi-model ({len(forecasts)}个, {len(daily_forecasts)}天): {labels_str}")
             
-            return {
+            result = {
                 "source": "multi_model",
                 "forecasts": forecasts,  # 今天 {"ECMWF": 12.3, "GFS": 11.8, ...} (向后兼容)
                 "daily_forecasts": daily_forecasts,  # 按天 {"2026-02-23": {...}, "2026-02-24": {...}}
                 "dates": dates,
                 "unit": "fahrenheit" if use_fahrenheit else "celsius",
             }
+            self._set_cached_model(cache_key, result)
+            return result
         except Exception as e:
             logger.warning(f"Multi-model API 请求失败: {e}")
             return None
@@ -806,7 +1040,7 @@ class WeatherDataCollector:
                 timeout=self.timeout
             )
             response.raise_for_status()
-            data = response.json()
+            data = orjson.loads(response.content)
             
             day_data = data.get("data_day", {})
             max_temps = day_data.get("temperature_max", [])
@@ -848,59 +1082,15 @@ class WeatherDataCollector:
         从标题中提取日期并标准化为 YYYY-MM-DD
         支持: "February 6", "2月6日", "2-6" 等
         """
-        # 1. 尝试英文月份
-        months = {
-            "January": "01", "February": "02", "March": "03", "April": "04",
-            "May": "05", "June": "06", "July": "07", "August": "08",
-            "September": "09", "October": "10", "November": "11", "December": "12",
-        }
-        for month_name, month_val in months.items():
-            if month_name in title:
-                match = re.search(f"{month_name}\\s+(\\d+)", title)
-                if match:
-                    day = int(match.group(1))
-                    year = datetime.now().year
-                    return f"{year}-{month_val}-{day:02d}"
-
-        # 2. 尝试中文格式 "2月7日" 或 "02月07日"
-        zh_match = re.search(r"(\d{1,2})月(\d{1,2})日", title)
-        if zh_match:
-            month = int(zh_match.group(1))
-            day = int(zh_match.group(2))
-            year = datetime.now().year
-            return f"{year}-{month:02d}-{day:02d}"
-        
-        # 3. 尝试 ISO 格式 YYYY-MM-DD
-        iso_match = re.search(r"(\d{4})-(\d{2})-(\d{2})", title)
-        if iso_match:
-            return iso_match.group(0)
-
-        return None
+        # 年份作为缓存键的一部分，跨年后不会返回旧年份的结果
+        return _extract_date_from_title(title, datetime.now().year)
 
     def get_coordinates(self, city: str) -> Optional[Dict[str, float]]:
         """
         使用 Open-Meteo Geocoding API 获取城市坐标 (免费, 无需 Key)
         """
-        # 坐标使用 METAR 机场位置（Polymarket 以机场数据结算）
-        static_coords = {
-            "london": {"lat": 51.5053, "lon": 0.0553},        # EGLC London City
-            "paris": {"lat": 49.0097, "lon": 2.5478},         # LFPG Charles de Gaulle
-            "new york": {"lat": 40.7750, "lon": -73.8750},    # KLGA LaGuardia
-            "new york's central park": {"lat": 40.7812, "lon": -73.9665},
-            "nyc": {"lat": 40.7750, "lon": -73.8750},         # KLGA LaGuardia
-            "seattle": {"lat": 47.4499, "lon": -122.3118},    # KSEA Sea-Tac
-            "chicago": {"lat": 41.9769, "lon": -87.9081},     # KORD O'Hare
-            "dallas": {"lat": 32.8459, "lon": -96.8509},      # KDAL Love Field
-            "miami": {"lat": 25.7933, "lon": -80.2906},       # KMIA International
-            "atlanta": {"lat": 33.6367, "lon": -84.4281},     # KATL Hartsfield-Jackson
-            "seoul": {"lat": 37.4691, "lon": 126.4510},       # RKSI Incheon
-            "toronto": {"lat": 43.6759, "lon": -79.6294},     # CYYZ Pearson
-            "ankara": {"lat": 40.1281, "lon": 32.9950},       # LTAC Esenboğa
-            "wellington": {"lat": -41.3272, "lon": 174.8053}, # NZWN Wellington
-            "buenos aires": {"lat": -34.8222, "lon": -58.5358}, # SAEZ Ezeiza
-        }
-
         normalized_city = city.lower().strip()
+        static_coords = self.STATIC_COORDS
         if normalized_city in static_coords:
             return static_coords[normalized_city]
 
@@ -910,6 +1100,10 @@ class WeatherDataCollector:
                 logger.debug(f"地理编码命中模糊映射: {city} -> {key}")
                 return static_coords[key]
 
+        cached = self._location_cache.get(normalized_city)
+        if cached:
+            return cached
+
         try:
             url = "https://geocoding-api.open-meteo.com/v1/search"
             response = self.session.get(
@@ -918,15 +1112,18 @@ class WeatherDataCollector:
                 timeout=15,  # 增加超时时间到 15s
             )
             response.raise_for_status()
-            results = response.json().get("results", [])
+            results = orjson.loads(response.content).get("results", [])
             if results:
                 res = results[0]
-                return {
+                coords = {
                     "lat": res.get("latitude"),
                     "lon": res.get("longitude"),
                     "name": res.get("name"),
                     "country": res.get("country"),
                 }
+                if coords["lat"] is not None and coords["lon"] is not None:
+                    self._save_location(normalized_city, coords)
+                return coords
         except Exception as e:
             logger.error(f"地理编码失败 ({city}): {e}")
         return None
@@ -935,41 +1132,7 @@ class WeatherDataCollector:
         """
         从 Polymarket 问题描述或 Slug 中提取城市名称
         """
-        q = question.lower()
-
-        # 1. 优先尝试已知城市列表 (硬编码匹配)
-        known_cities = {
-            "london": "London", "伦敦": "London",
-            "new york": "New York", "new york's central park": "New York", "nyc": "New York", "纽约": "New York",
-            "seattle": "Seattle", "西雅图": "Seattle",
-            "chicago": "Chicago", "芝加哥": "Chicago",
-            "dallas": "Dallas", "达拉斯": "Dallas",
-            "miami": "Miami", "迈阿密": "Miami",
-            "atlanta": "Atlanta", "亚特兰大": "Atlanta",
-            "seoul": "Seoul", "首尔": "Seoul",
-            "toronto": "Toronto", "多伦多": "Toronto",
-            "ankara": "Ankara", "安卡拉": "Ankara",
-            "wellington": "Wellington", "惠灵顿": "Wellington",
-            "buenos aires": "Buenos Aires", "布宜诺斯艾利斯": "Buenos Aires"
-        }
-        
-        for key, val in known_cities.items():
-            if key in q:
-                return val
-
-        # 2. 从英文模板中提取
-        triggers = ["temperature in ", "temp in ", "weather in ", "highest-temperature-in-", "temperature-in-"]
-        for trigger in triggers:
-            if trigger in q:
-                part = q.split(trigger)[1]
-                delimiters = [" on ", " at ", " above ", " below ", " be ", " is ", " will ", " has ", " reached ", "?", " (", ", ", "-"]
-                city = part
-                for d in delimiters:
-                    if d in city:
-                        city = city.split(d)[0]
-                return city.strip().title()
-
-        return None
+        return _extract_city_from_question(question)
 
     def fetch_all_sources(
         self, city: str, lat: float = None, lon: float = None, country: str = None
@@ -979,35 +1142,9 @@ class WeatherDataCollector:
         """
         results = {}
 
-        # 判断是否为美国市场（使用华氏度）
-        us_cities = {
-            "dallas",
-            "nyc",
-            "new york",
-            "seattle",
-            "miami",
-            "atlanta",
-            "chicago",
-            "los angeles",
-            "san francisco",
-            "washington",
-            "boston",
-            "houston",
-            "phoenix",
-            "philadelphia",
-            "new york's central park",
-            "portland",
-            "denver",
-            "austin",
-            "san diego",
-            "detroit",
-            "cleveland",
-            "minneapolis",
-            "st. louis",
-        }
         city_lower = city.lower().strip()
         # 严格判断是否为美国市场（必须完全匹配列表或缩写）
-        use_fahrenheit = city_lower in us_cities
+        use_fahrenheit = city_lower in self.US_CITIES
 
         if use_fahrenheit:
             logger.info(f"🌡️ {city} 使用华氏度 (°F)")
@@ -1015,55 +1152,57 @@ class WeatherDataCollector:
             logger.info(f"🌡️ {city} 使用摄氏度 (°C)")
 
         if lat and lon:
-            open_meteo = self.fetch_from_open_meteo(
-                lat, lon, use_fahrenheit=use_fahrenheit
-            )
+            submit = self._executor.submit
+            # 不依赖 Open-Meteo 结果的数据源与它同时发出，不必等它返回
+            om_future = submit(self.fetch_from_open_meteo, lat, lon, use_fahrenheit=use_fahrenheit)
+            # 对安卡拉，额外获取 MGM 官方数据
+            mgm_future = submit(self.fetch_from_mgm, "17128") if city_lower == "ankara" else None
+            # 对美国城市，额外获取 NWS 高精预报
+            nws_future = submit(self.fetch_nws, lat, lon) if use_fahrenheit else None
+            # 集合预报 (所有城市通用，用于不确定性分析)
+            ensemble_future = submit(self.fetch_ensemble, lat, lon, use_fahrenheit=use_fahrenheit)
+            # 多模型预报 (所有城市通用，用于共识评分)
+            multi_model_future = submit(self.fetch_multi_model, lat, lon, use_fahrenheit=use_fahrenheit)
+
+            open_meteo = om_future.result()
             if open_meteo:
                 results["open-meteo"] = open_meteo
                 # 获取时区偏移以过滤 METAR
                 utc_offset = open_meteo.get("utc_offset", 0)
-                metar_data = self.fetch_metar(city, use_fahrenheit=use_fahrenheit, utc_offset=utc_offset)
-                if metar_data:
-                    results["metar"] = metar_data
-                
-                # 对安卡拉，额外获取 MGM 官方数据
-                if city_lower == "ankara":
-                    mgm_data = self.fetch_from_mgm("17128")
-                    if mgm_data:
-                        results["mgm"] = mgm_data
+
+                # METAR 需要时区偏移、Meteoblue 需要时区名，只能在 Open-Meteo 返回后发出
+                futures = [
+                    ("metar", submit(self.fetch_metar, city, use_fahrenheit=use_fahrenheit, utc_offset=utc_offset)),
+                ]
+                if mgm_future:
+                    futures.append(("mgm", mgm_future))
                 
                 # 对伦敦，获取 Meteoblue 预测 (公认最准)
                 if city_lower == "london":
-                    mb_data = self.fetch_from_meteoblue(
-                        lat, lon, 
+                    futures.append(("meteoblue", submit(
+                        self.fetch_from_meteoblue,
+                        lat, lon,
                         timezone_name=open_meteo.get("timezone", "UTC"),
-                        use_fahrenheit=use_fahrenheit
-                    )
-                    if mb_data:
-                        results["meteoblue"] = mb_data
-
-                # 对美国城市，额外获取 NWS 高精预报
-                if use_fahrenheit:
-                    nws_data = self.fetch_nws(lat, lon)
-                    if nws_data:
-                        results["nws"] = nws_data
-                
-                # 集合预报 (所有城市通用，用于不确定性分析)
-                ens_data = self.fetch_ensemble(lat, lon, use_fahrenheit=use_fahrenheit)
-                if ens_data:
-                    results["ensemble"] = ens_data
-                
-                # 多模型预报 (所有城市通用，用于共识评分)
-                mm_data = self.fetch_multi_model(lat, lon, use_fahrenheit=use_fahrenheit)
-                if mm_data:
-                    results["multi_model"] = mm_data
+                        use_fahrenheit=use_fahrenheit,
+                    )))
+
+                if nws_future:
+                    futures.append(("nws", nws_future))
+                futures.append(("ensemble", ensemble_future))
+                futures.append(("multi_model", multi_model_future))
+
+                # 按原有顺序收集，保持 results 的键顺序不变
+                for key, future in futures:
+                    data = future.result()
+                    if data:
+                        results[key] = data
             else:
-                # Open-Meteo 失败时，仍然尝试获取 METAR 和 NWS
+                # Open-Meteo 失败时，仍然尝试获取 METAR 和 NWS（其余已发出的请求结果不再使用）
                 metar_data = self.fetch_metar(city, use_fahrenheit=use_fahrenheit)
                 if metar_data:
                     results["metar"] = metar_data
-                if use_fahrenheit:
-                    nws_data = self.fetch_nws(lat, lon)
+                if nws_future:
+                    nws_data = nws_future.result()
                     if nws_data:
                         results["nws"] = nws_data
         else:
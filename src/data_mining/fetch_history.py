@@ -2,29 +2,36 @@ import os
 import sys
 import json
 import logging
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 import pandas as pd
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-def fetch_historical_data_for_city(city_info, output_dir):
+# Shared session: every city hits the same archive host, so reuse the TLS connection
+# and retry transient failures (rate limits / 5xx) with backoff instead of dropping the city
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=8,
+    max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504)),
+))
+
+def fetch_historical_data_for_city(city_info, output_dir, end_date):
     city_name = city_info['city']
     lat = city_info['latitude']
     lon = city_info['longitude']
     
-    # We will fetch data from Jan 1, 2023 to yesterday (or to latest available)
+    # We will fetch data from Jan 1, 2023 up to end_date (computed once per run in main)
     start_date = "2023-01-01"
-    end_date = "2025-12-31"  # API handles dates in the future up to latest available archive usually 
-    # For safety let's use a dynamic yesterday end_date
-    import datetime
-    today = datetime.datetime.now()
-    yesterday = (today - datetime.timedelta(days=2)).strftime("%Y-%m-%d")
     
     url = (
         f"https://archive-api.open-meteo.com/v1/archive?latitude={lat}&longitude={lon}"
-        f"&start_date={start_date}&end_date={yesterday}"
+        f"&start_date={start_date}&end_date={end_date}"
         "&hourly=temperature_2m,relative_humidity_2m,wind_speed_10m,wind_direction_10m,"
         "cloud_cover,shortwave_radiation,precipitation,surface_pressure"
         "&timezone=auto"
@@ -33,7 +40,7 @@ def fetch_historical_data_for_city(city_info, output_dir):
     logging.info(f"Downloading historical data for {city_name} (Lat: {lat}, Lon: {lon})...")
     
     try:
-        response = requests.get(url, timeout=60)
+        response = _SESSION.get(url, timeout=60)
         response.raise_for_status()
         data = response.json()
         
@@ -78,8 +85,13 @@ def main():
         logging.warning("No cities found in config.yaml")
         return
         
-    for city_info in cities:
-        fetch_historical_data_for_city(city_info, output_dir)
+    # The archive lags real time by a couple of days; compute the range end once for all cities
+    end_date = (datetime.now() - timedelta(days=2)).strftime("%Y-%m-%d")
+
+    # Each city is an independent multi-year download; run a few at once so total time
+    # tracks the slowest city rather than the sum (kept small to stay polite to the archive API)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        list(executor.map(lambda city_info: fetch_historical_data_for_city(city_info, output_dir, end_date), cities))
         
 if __name__ == "__main__":
     main()